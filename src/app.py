@@ -3,73 +3,131 @@ from __future__ import annotations
 import io
 import logging
 
+import numpy as np
 import pandas as pd
+import plotly.graph_objects as go
+import pyarrow as pa
+import pyarrow.csv as pac
 import streamlit as st
 from dotenv import load_dotenv
 
-from src.components.sidebar import render_smart_filters
+from src.components.sidebar import FilterMeta, SmartFilters, filter_metadata, render_smart_filters
 from src.core.processing import apply_smart_filters
-from src.core.risk import (
-    classify_risk_band,
-    compute_risk_score,
-    compute_value_at_risk,
-    flag_critical_dti,
-)
+from src.core.risk import compute_risk_arrays, compute_value_at_risk
 from src.core.story import headline_risk_concentration
 from src.core.formatting import fmt_int_ptbr, fmt_money_ptbr, fmt_pct
 from src.database.loader import load_dataset
-from src.visualizations import build_segment_profile, fig_risk_by_segment
+from src.visualizations import build_segment_profiles, fig_risk_by_segment
+
+DATASET_FILENAME = "Loan_default.csv"
+# Caches keyed on filters (or on views derived from them) are shared across sessions;
+# the income slider alone yields one key per drag position, so keep them bounded.
+VIEW_CACHE_ENTRIES = 32
 
 
 def enrich_risk(df: pd.DataFrame) -> pd.DataFrame:
     """
     Enrich dataframe with risk proxy, value-at-risk per item, DTI critical flags and risk bands.
     """
-    rs = compute_risk_score(df)
-    out = df.copy()
-    out["risk_score"] = rs
-    out["risk_band"] = classify_risk_band(out["risk_score"])
-    out["value_at_risk_item"] = out["LoanAmount"].astype(float) * out["risk_score"]
-    out["critical_dti"] = flag_critical_dti(out, 0.40)
-    return out
+    return df.assign(**vars(compute_risk_arrays(df, 0.40)))
+
+
+@st.cache_data(show_spinner=False)
+def _enrich_baseline(filename: str) -> pd.DataFrame:
+    """
+    Baseline enrichment depends only on the dataset, so it runs once per process.
+    """
+    return enrich_risk(load_dataset(filename))
+
+
+@st.cache_data(show_spinner=False)
+def _filter_meta(filename: str) -> FilterMeta:
+    """
+    Sidebar bounds/options per dataset: no column scans on reruns.
+    """
+    return filter_metadata(load_dataset(filename))
+
+
+@st.cache_data(show_spinner=False, max_entries=VIEW_CACHE_ENTRIES)
+def _current_view(filename: str, f: SmartFilters) -> pd.DataFrame:
+    """
+    Filtered + enriched slice keyed on (dataset, filters), so widgets that do not
+    touch the filters skip the full-frame scan. Rows are sliced from the enriched
+    baseline: scores use the population InterestRate p5/p95 and are never recomputed.
+    """
+    return apply_smart_filters(_enrich_baseline(filename), f)
+
+
+@st.cache_data(show_spinner=False, max_entries=VIEW_CACHE_ENTRIES)
+def _segment_profiles(filename: str, f: SmartFilters, dims: tuple[str, ...]) -> dict[str, pd.DataFrame]:
+    return build_segment_profiles(_current_view(filename, f), list(dims))
+
+
+@st.cache_data(show_spinner=False, max_entries=VIEW_CACHE_ENTRIES)
+def _segment_figures(filename: str, f: SmartFilters, dims: tuple[str, ...]) -> dict[str, go.Figure]:
+    """
+    Risk-by-segment charts keyed on (dataset, filters) like _segment_profiles, so
+    reruns hash only the small signature, never the frames behind the figures.
+    """
+    segments = _segment_profiles(filename, f, dims)
+    return {dim: fig_risk_by_segment(segments[dim], dim) for dim in dims}
+
+
+def _kpi_block(df: pd.DataFrame) -> dict[str, float | int]:
+    """
+    Panorama KPIs for one frame: a single 2D reduction instead of one Series scan per KPI.
+    """
+    a = df[["Default", "CreditScore", "critical_dti"]].to_numpy(dtype=np.float64)
+    default_rate, score, crit_rate = a.mean(axis=0).tolist()
+    return {
+        "default_rate": default_rate,
+        "var": compute_value_at_risk(df, df["risk_score"]),
+        "score": score,
+        "crit_rate": crit_rate,
+        "crit_count": int(a[:, 2].sum()),
+    }
+
+
+@st.cache_data(show_spinner=False)
+def _baseline_kpis(filename: str) -> dict[str, float | int]:
+    """
+    Baseline KPIs depend only on the dataset, so they are reduced once per process.
+    """
+    return _kpi_block(_enrich_baseline(filename))
 
 
-def compute_panorama_kpis(df_cur: pd.DataFrame, df_base: pd.DataFrame) -> dict[str, float | int]:
+@st.cache_data(show_spinner=False, max_entries=VIEW_CACHE_ENTRIES)
+def _view_kpis(filename: str, f: SmartFilters) -> dict[str, float | int]:
     """
-    Compute KPIs for current filtered view and baseline, plus deltas.
+    Current-view KPIs keyed on (dataset, filters), like _current_view; reruns that
+    do not touch the filters skip the reduction.
     """
-    # Current
-    default_rate_cur = float(df_cur["Default"].mean())
-    var_cur = compute_value_at_risk(df_cur, df_cur["risk_score"])
-    score_cur = float(df_cur["CreditScore"].mean())
-    crit_rate_cur = float(df_cur["critical_dti"].mean())
-    crit_count_cur = int(df_cur["critical_dti"].sum())
-
-    # Baseline
-    default_rate_base = float(df_base["Default"].mean())
-    var_base = compute_value_at_risk(df_base, df_base["risk_score"])
-    score_base = float(df_base["CreditScore"].mean())
-    crit_rate_base = float(df_base["critical_dti"].mean())
+    return _kpi_block(_current_view(filename, f))
+
 
+def compute_panorama_kpis(cur: dict[str, float | int], base: dict[str, float | int]) -> dict[str, float | int]:
+    """
+    Combine current-view and baseline KPIs, plus deltas against the baseline.
+    """
     return {
-        "default_rate_cur": default_rate_cur,
-        "var_cur": var_cur,
-        "score_cur": score_cur,
-        "crit_rate_cur": crit_rate_cur,
-        "crit_count_cur": crit_count_cur,
-        "default_rate_base": default_rate_base,
-        "var_base": var_base,
-        "score_base": score_base,
-        "crit_rate_base": crit_rate_base,
-        "d_default": default_rate_cur - default_rate_base,
-        "d_var": var_cur - var_base,
-        "d_score": score_cur - score_base,
-        "d_crit": crit_rate_cur - crit_rate_base,
+        "default_rate_cur": cur["default_rate"],
+        "var_cur": cur["var"],
+        "score_cur": cur["score"],
+        "crit_rate_cur": cur["crit_rate"],
+        "crit_count_cur": cur["crit_count"],
+        "default_rate_base": base["default_rate"],
+        "var_base": base["var"],
+        "score_base": base["score"],
+        "crit_rate_base": base["crit_rate"],
+        "d_default": cur["default_rate"] - base["default_rate"],
+        "d_var": cur["var"] - base["var"],
+        "d_score": cur["score"] - base["score"],
+        "d_crit": cur["crit_rate"] - base["crit_rate"],
     }
 
 
-def render_panorama(df_cur: pd.DataFrame, df_base: pd.DataFrame) -> None:
-    k = compute_panorama_kpis(df_cur, df_base)
+def render_panorama(df_cur: pd.DataFrame, cur: dict[str, float | int], base: dict[str, float | int]) -> None:
+    k = compute_panorama_kpis(cur, base)
 
     st.subheader("O Panorama — Estamos seguros?")
     c1, c2, c3, c4 = st.columns(4)
@@ -112,33 +170,35 @@ def render_panorama(df_cur: pd.DataFrame, df_base: pd.DataFrame) -> None:
 
     with st.container(border=True):
         st.markdown("**Distribuição por faixa de risco (recorte atual)**")
-        band_counts = (
-            df_cur["risk_band"]
-            .value_counts(dropna=False)
-            .rename_axis("risk_band")
-            .reset_index(name="count")
+        bands = df_cur["risk_band"].cat
+        band_counts = pd.DataFrame(
+            {
+                "risk_band": bands.categories,
+                "count": np.bincount(bands.codes.to_numpy(), minlength=len(bands.categories)).astype(np.int32),
+            }
         )
-        band_counts["count"] = band_counts["count"].astype(int)
         st.dataframe(band_counts, width='content', hide_index=True)
 
 
-def render_problema(df_cur: pd.DataFrame) -> None:
+def render_problema(f: SmartFilters) -> None:
     st.subheader("O Problema — Onde está o fogo?")
     st.caption("Segmentos priorizados por Valor em Risco (proxy). Passe o mouse para ver o perfil do grupo.")
 
-    seg_purpose = build_segment_profile(df_cur, "LoanPurpose")
-    seg_emp = build_segment_profile(df_cur, "EmploymentType")
+    dims = ("LoanPurpose", "EmploymentType")
+    segments = _segment_profiles(DATASET_FILENAME, f, dims)
+    figures = _segment_figures(DATASET_FILENAME, f, dims)
+    seg_purpose = segments["LoanPurpose"]
 
     left, right = st.columns(2)
     with left:
         st.plotly_chart(
-            fig_risk_by_segment(seg_purpose, "LoanPurpose"),
+            figures["LoanPurpose"],
             width='stretch',
             key="p1_risk_purpose",
         )
     with right:
         st.plotly_chart(
-            fig_risk_by_segment(seg_emp, "EmploymentType"),
+            figures["EmploymentType"],
             width='stretch',
             key="p1_risk_emp",
         )
@@ -152,17 +212,29 @@ def render_problema(df_cur: pd.DataFrame) -> None:
     st.divider()
 
     # Microinteração: Profile Card do segmento selecionado
+    st.session_state["segments"] = segments
+    render_segment_card()
+
+
+@st.fragment
+def render_segment_card() -> None:
+    """
+    Profile card for the selected segment. Runs as a fragment so dim/value
+    selection does not rerun the charts above; segments come from session_state.
+    """
+    segments: dict[str, pd.DataFrame] = st.session_state["segments"]
+
     st.markdown("### Microinteração — Perfil predominante do segmento selecionado")
 
     colA, colB = st.columns([1, 1])
     with colA:
         seg_choice_dim = st.selectbox(
             "Dimensão",
-            ["LoanPurpose", "EmploymentType"],
+            list(segments),
             index=0,
             key="seg_choice_dim",
         )
-        seg_table = seg_purpose if seg_choice_dim == "LoanPurpose" else seg_emp
+        seg_table = segments[seg_choice_dim]
 
         if seg_table.empty:
             st.warning("Sem segmentos disponíveis neste recorte.")
@@ -170,7 +242,7 @@ def render_problema(df_cur: pd.DataFrame) -> None:
 
         seg_value = st.selectbox(
             "Segmento",
-            seg_table[seg_choice_dim].astype(str).tolist(),
+            seg_table[seg_choice_dim].tolist(),
             key="seg_value",
         )
 
@@ -200,7 +272,53 @@ def render_problema(df_cur: pd.DataFrame) -> None:
             )
 
 
-def render_acao(df_cur: pd.DataFrame) -> None:
+def _topk_idx(df: pd.DataFrame, sort_by: str, top_n: int, only_critical: bool) -> np.ndarray:
+    """
+    Row positions of the top_n rows by sort_by (descending).
+    argpartition selects in O(N); only the k selected rows are sorted.
+    """
+    vals = df[sort_by].to_numpy()
+    pos = np.flatnonzero(df["critical_dti"].to_numpy()) if only_critical else None
+    if pos is not None:
+        vals = vals[pos]
+
+    if top_n < len(vals):
+        idx = np.argpartition(-vals, top_n - 1)[:top_n]
+    else:
+        idx = np.arange(len(vals))
+    idx = idx[np.argsort(-vals[idx], kind="stable")]
+    return pos[idx] if pos is not None else idx
+
+
+@st.cache_data(show_spinner=False, max_entries=VIEW_CACHE_ENTRIES)
+def _to_csv(view: pd.DataFrame) -> bytes:
+    """
+    CSV export written by Arrow's C++ writer straight from the columnar buffers.
+    """
+    buf = io.BytesIO()
+    pac.write_csv(pa.Table.from_pandas(view, preserve_index=False), buf)
+    return buf.getvalue()
+
+
+@st.cache_data(show_spinner=False, max_entries=VIEW_CACHE_ENTRIES)
+def _to_xlsx(view: pd.DataFrame) -> bytes:
+    """
+    Excel export of the action list, cached on the (small) view contents so
+    reruns with an unchanged list skip the openpyxl workbook build.
+    """
+    buf = io.BytesIO()
+    view.to_excel(buf, index=False, sheet_name="action_list")
+    return buf.getvalue()
+
+
+@st.fragment
+def render_acao() -> None:
+    """
+    Action list as a fragment: Top-N/sort/critical widgets rerun only this section.
+    The current slice is read from session_state (set once per full run in main).
+    """
+    df_cur: pd.DataFrame = st.session_state["df_cur"]
+
     st.subheader("A Ação — Qual mangueira usar agora?")
     st.caption("Lista priorizada por risco estimado (proxy). Use os controles para focar no que é mais acionável.")
 
@@ -217,10 +335,6 @@ def render_acao(df_cur: pd.DataFrame) -> None:
             key="sort_by",
         )
 
-    action = df_cur.sort_values([sort_by], ascending=False).head(top_n).copy()
-    if only_critical:
-        action = action[action["critical_dti"]].copy()
-
     # Minimização: ocultar LoanID por padrão
     cols = [
         "risk_band",
@@ -239,32 +353,45 @@ def render_acao(df_cur: pd.DataFrame) -> None:
         "Education",
         "MaritalStatus",
     ]
-    view = action[cols].copy()
+    # Single row+column take; the view is read-only (display/exports), so no copies.
+    # get_indexer marks missing labels with -1, which iloc would read as the last column.
+    col_idx = df_cur.columns.get_indexer(cols)
+    if (col_idx < 0).any():
+        raise KeyError([c for c, i in zip(cols, col_idx, strict=True) if i < 0])
+    view = df_cur.iloc[_topk_idx(df_cur, sort_by, top_n, only_critical), col_idx]
 
     with st.container(border=True):
         st.markdown("**Lista priorizada (recorte atual)**")
-        st.dataframe(view, width='content')
+        # Formatting happens client-side; the frame is sent with raw numeric values
+        st.dataframe(
+            view,
+            width='content',
+            column_config={
+                "risk_score": st.column_config.NumberColumn(format="%.3f"),
+                "value_at_risk_item": st.column_config.NumberColumn(format="%.0f"),
+                "InterestRate": st.column_config.NumberColumn(format="%.2f"),
+                "DTIRatio": st.column_config.NumberColumn(format="%.2f"),
+            },
+        )
 
     # Exports
     st.markdown("### Exportação (lista de ação)")
     c1, c2 = st.columns(2)
 
-    csv_bytes = view.to_csv(index=False).encode("utf-8")
     with c1:
         st.download_button(
             "Baixar CSV",
-            data=csv_bytes,
+            data=_to_csv(view),
             file_name="action_list.csv",
             mime="text/csv",
             key="dl_action_csv",
         )
 
-    xlsx_buffer = io.BytesIO()
-    view.to_excel(xlsx_buffer, index=False, sheet_name="action_list")
     with c2:
         st.download_button(
             "Baixar Excel",
-            data=xlsx_buffer.getvalue(),
+            # Deferred: the workbook is built when the button is clicked, not on every rerun
+            data=lambda: _to_xlsx(view),
             file_name="action_list.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             key="dl_action_xlsx",
@@ -281,29 +408,33 @@ def main() -> None:
 
     # Load
     try:
-        df = load_dataset("Loan_default.csv")
+        meta = _filter_meta(DATASET_FILENAME)
     except Exception as exc:
         st.error(f"Falha ao carregar dataset: {exc}")
         st.stop()
 
     # Smart filters (persistent)
-    f = render_smart_filters(df)
-    df_f = apply_smart_filters(df, f)
+    f = render_smart_filters(meta)
 
-    if df_f.empty:
+    # Enrich risk (baseline + filtered, memoized on the filter signature)
+    df_cur = _current_view(DATASET_FILENAME, f)
+    if df_cur.empty:
         st.warning("Nenhum registro após aplicação dos filtros.")
         st.stop()
 
-    # Enrich risk (baseline + filtered)
-    df_base = enrich_risk(df)
-    df_cur = enrich_risk(df_f)
+    # Baseline only enters as KPIs; once per session, reuse the reduced dict
+    base_key = f"kpi_base:{DATASET_FILENAME}"
+    if base_key not in st.session_state:
+        st.session_state[base_key] = _baseline_kpis(DATASET_FILENAME)
+    base = st.session_state[base_key]
 
     # Layout: Panorama -> Problema -> Ação
-    render_panorama(df_cur, df_base)
+    render_panorama(df_cur, _view_kpis(DATASET_FILENAME, f), base)
     st.divider()
-    render_problema(df_cur)
+    render_problema(f)
     st.divider()
-    render_acao(df_cur)
+    st.session_state["df_cur"] = df_cur
+    render_acao()
 
     # Transparência e roadmap (Princípios base)
     with st.expander("Transparência, limitações e uso responsável"):
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
@@ -13,18 +14,42 @@ class SmartFilters:
     employment_type: list[str]
 
 
+@dataclass(frozen=True)
+class FilterMeta:
+    """
+    Dataset-derived widget bounds/options; computed once per dataset, not per rerun.
+    """
+
+    income_range: tuple[float, float]
+    loan_purposes: list[str]
+    employment_types: list[str]
+
+
 def _minmax(series: pd.Series) -> tuple[float, float]:
-    return float(series.min()), float(series.max())
+    arr = series.to_numpy()
+    return float(np.nanmin(arr)), float(np.nanmax(arr))
+
+
+def _options(series: pd.Series) -> list[str]:
+    return sorted(pd.unique(series.dropna().to_numpy()).tolist())
+
+
+def filter_metadata(df: pd.DataFrame) -> FilterMeta:
+    return FilterMeta(
+        income_range=_minmax(df["Income"]),
+        loan_purposes=_options(df["LoanPurpose"]),
+        employment_types=_options(df["EmploymentType"]),
+    )
 
 
-def render_smart_filters(df: pd.DataFrame) -> SmartFilters:
+def render_smart_filters(meta: FilterMeta) -> SmartFilters:
     """
     Smart + persistent filters (session_state).
     """
     with st.sidebar:
         st.header("Filtros (simulação rápida)")
 
-        inc_min, inc_max = _minmax(df["Income"])
+        inc_min, inc_max = meta.income_range
 
         # Persistência via session_state
         if "income_range" not in st.session_state:
@@ -44,14 +69,14 @@ def render_smart_filters(df: pd.DataFrame) -> SmartFilters:
 
         loan_purpose = st.multiselect(
             "Finalidade (LoanPurpose)",
-            sorted(df["LoanPurpose"].dropna().unique().tolist()),
+            meta.loan_purposes,
             default=st.session_state["loan_purpose"],
             key="loan_purpose",
         )
 
         employment_type = st.multiselect(
             "Tipo de emprego (EmploymentType)",
-            sorted(df["EmploymentType"].dropna().unique().tolist()),
+            meta.employment_types,
             default=st.session_state["employment_type"],
             key="employment_type",
         )
@@ -1,24 +1,19 @@
 from __future__ import annotations
 
-
-def fmt_pct(x: float) -> str:
-    return f"{x:.2%}"
+# pt-BR separators: swap "," and "." in a single translate pass
+_BR_SEPARATORS = str.maketrans(",.", ".,")
 
 
 def fmt_br_money(x: float) -> str:
-    return f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
+    return f"{x:,.2f}".translate(_BR_SEPARATORS)
 
-def fmt_int_ptbr(n: int) -> str:
-    return f"{n:,}".replace(",", ".")
 
 def fmt_int_ptbr(n: int) -> str:
     return f"{n:,}".replace(",", ".")
 
 
 def fmt_money_ptbr(x: float, decimals: int = 0) -> str:
-    s = f"{x:,.{decimals}f}"
-    return s.replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"{x:,.{decimals}f}".translate(_BR_SEPARATORS)
 
 
 def fmt_pct(x: float, decimals: int = 1) -> str:
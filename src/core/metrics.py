@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
 
@@ -9,20 +10,23 @@ def compute_kpis(df: pd.DataFrame) -> dict[str, Any]:
     if df.empty:
         return {
             "total_loans": 0,
+            "total_defaults": 0,
             "default_rate": 0.0,
             "avg_loan_amount": 0.0,
             "avg_credit_score": 0.0,
             "avg_interest_rate": 0.0,
         }
 
-    total = int(len(df))
-    default_rate = float(df["Default"].mean())
+    # One column-major reduction instead of four Series means
+    arr = df[["Default", "LoanAmount", "CreditScore", "InterestRate"]].to_numpy(dtype=np.float64)
+    default_rate, avg_loan, avg_score, avg_rate = np.nanmean(arr, axis=0).tolist()
     return {
-        "total_loans": total,
+        "total_loans": int(len(df)),
+        "total_defaults": int(np.nansum(arr[:, 0])),
         "default_rate": default_rate,
-        "avg_loan_amount": float(df["LoanAmount"].mean()),
-        "avg_credit_score": float(df["CreditScore"].mean()),
-        "avg_interest_rate": float(df["InterestRate"].mean()),
+        "avg_loan_amount": avg_loan,
+        "avg_credit_score": avg_score,
+        "avg_interest_rate": avg_rate,
     }
 
 
@@ -34,11 +38,15 @@ def segment_default_rate(df: pd.DataFrame, by: str, min_count: int = 200) -> pd.
     if df.empty:
         return pd.DataFrame({by: [], "default_rate": [], "count": []})
 
-    out = (
-        df.groupby(by, dropna=False)
-        .agg(default_rate=("Default", "mean"), count=("LoanID", "count"))
-        .reset_index()
-    )
+    return _segment_rates(df[by], df["Default"].to_numpy(dtype=np.float64), min_count)
+
+
+def _segment_rates(col: pd.Series, default: np.ndarray, min_count: int) -> pd.DataFrame:
+    # Group size and Default sum via bincount over factorized codes (one pass each)
+    codes, uniques = pd.factorize(col, sort=True, use_na_sentinel=False)
+    counts = np.bincount(codes, minlength=len(uniques))
+    sums = np.bincount(codes, weights=default, minlength=len(uniques))
+    out = pd.DataFrame({col.name: uniques, "default_rate": sums / counts, "count": counts})
     out = out[out["count"] >= min_count].sort_values(
         ["default_rate", "count"], ascending=[False, False]
     )
@@ -48,12 +56,13 @@ def segment_default_rate(df: pd.DataFrame, by: str, min_count: int = 200) -> pd.
 def top_segments_multi(df: pd.DataFrame, dimensions: list[str], min_count: int = 200, top_n: int = 5) -> dict[str, pd.DataFrame]:
     """
     For each dimension, compute segment default rate table and return top_n.
+    The Default weights are materialized once and shared by every dimension.
     """
-    results: dict[str, pd.DataFrame] = {}
-    for dim in dimensions:
-        seg = segment_default_rate(df, dim, min_count=min_count).head(top_n)
-        results[dim] = seg
-    return results
+    if df.empty:
+        return {dim: segment_default_rate(df, dim, min_count=min_count) for dim in dimensions}
+
+    default = df["Default"].to_numpy(dtype=np.float64)
+    return {dim: _segment_rates(df[dim], default, min_count).head(top_n) for dim in dimensions}
 
 
 def compare_drivers(df: pd.DataFrame, numeric_cols: list[str]) -> pd.DataFrame:
@@ -68,15 +77,12 @@ def compare_drivers(df: pd.DataFrame, numeric_cols: list[str]) -> pd.DataFrame:
     if 0 not in g.index or 1 not in g.index:
         return pd.DataFrame(columns=["feature", "mean_default_0", "mean_default_1", "delta", "delta_pct"])
 
-    rows = []
-    for col in numeric_cols:
-        m0 = float(g.loc[0, col])
-        m1 = float(g.loc[1, col])
-        delta = m1 - m0
-        delta_pct = (delta / m0) if m0 != 0 else 0.0
-        rows.append(
-            {"feature": col, "mean_default_0": m0, "mean_default_1": m1, "delta": delta, "delta_pct": delta_pct}
-        )
-
-    out = pd.DataFrame(rows).sort_values("delta_pct", ascending=False)
+    m0 = g.loc[0, numeric_cols].to_numpy(dtype=np.float64)
+    m1 = g.loc[1, numeric_cols].to_numpy(dtype=np.float64)
+    delta = m1 - m0
+    delta_pct = np.divide(delta, m0, out=np.zeros_like(delta), where=m0 != 0)
+
+    out = pd.DataFrame(
+        {"feature": numeric_cols, "mean_default_0": m0, "mean_default_1": m1, "delta": delta, "delta_pct": delta_pct}
+    ).sort_values("delta_pct", ascending=False)
     return out
@@ -1,19 +1,39 @@
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
 from src.components.sidebar import SmartFilters
 
 
-def apply_smart_filters(df: pd.DataFrame, f: SmartFilters) -> pd.DataFrame:
-    mask = pd.Series(True, index=df.index)
+def _isin_mask(col: pd.Series, values: list[str]) -> np.ndarray:
+    """
+    Membership mask. For categoricals it is a lookup table over the categories
+    gathered by code (no per-row string hashing); the extra False slot maps NaN (-1).
+    One selected category or all of them reduce to a single code comparison.
+    """
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        hit = col.cat.categories.isin(values)
+        codes = col.cat.codes.to_numpy()
+        if hit.all():
+            return codes >= 0
+        if hit.sum() == 1:
+            return codes == hit.argmax()
+        return np.append(hit, False)[codes]
+    return col.isin(values).to_numpy()
+
 
-    mask &= df["Income"].between(f.income_range[0], f.income_range[1])
+def apply_smart_filters(df: pd.DataFrame, f: SmartFilters) -> pd.DataFrame:
+    # Single bool buffer, AND-ed in place (no index alignment, no Series temporaries)
+    income = df["Income"].to_numpy()
+    mask = np.greater_equal(income, f.income_range[0])
+    np.logical_and(mask, income <= f.income_range[1], out=mask)
 
     if f.loan_purpose:
-        mask &= df["LoanPurpose"].isin(f.loan_purpose)
+        mask &= _isin_mask(df["LoanPurpose"], f.loan_purpose)
 
     if f.employment_type:
-        mask &= df["EmploymentType"].isin(f.employment_type)
+        mask &= _isin_mask(df["EmploymentType"], f.employment_type)
 
-    return df.loc[mask].copy()
+    # Positional take already materializes new blocks; a trailing .copy() would duplicate them
+    return df.iloc[np.flatnonzero(mask)]
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+
+import numpy as np
 import pandas as pd
 
 
@@ -15,36 +18,82 @@ def compute_risk_score(df: pd.DataFrame) -> pd.Series:
     - Higher DTI increases risk
     - Lower CreditScore increases risk
     - Higher InterestRate increases risk
+
+    Computed on raw float32 arrays with in-place ufuncs: one accumulator plus one
+    scratch buffer, instead of a fresh temporary per arithmetic step.
     """
     # Normalize to 0..1 with robust clipping
-    dti = df["DTIRatio"].clip(lower=0, upper=1)
+    score = np.clip(df["DTIRatio"].to_numpy(dtype=np.float32), 0, 1)
+    score *= 0.45
 
-    # CreditScore typical range: 300..850
-    cs_norm = ((df["CreditScore"].clip(300, 850) - 300) / (850 - 300)).clip(0, 1)
-    cs_risk = 1 - cs_norm
+    # CreditScore typical range: 300..850 (astype copies, so the frame is never written)
+    tmp = df["CreditScore"].to_numpy().astype(np.float32)
+    tmp -= 300
+    tmp /= 850 - 300
+    np.clip(tmp, 0, 1, out=tmp)
+    np.subtract(1, tmp, out=tmp)
+    tmp *= 0.35
+    score += tmp
 
     # InterestRate: normalize to 0..1 using p5..p95 to reduce outlier effect
-    ir = df["InterestRate"].astype(float)
-    p5, p95 = ir.quantile(0.05), ir.quantile(0.95)
-    ir_norm = ((ir - p5) / (p95 - p5)).clip(0, 1) if p95 > p5 else ir * 0
+    ir = df["InterestRate"].to_numpy(dtype=np.float32)
+    p5, p95 = np.nanquantile(ir, [0.05, 0.95]).tolist()  # one pass, NaN-skipping like Series.quantile
+    if p95 > p5:
+        np.subtract(ir, p5, out=tmp)
+        tmp /= p95 - p5
+        np.clip(tmp, 0, 1, out=tmp)
+        tmp *= 0.20
+        score += tmp
 
-    # Weighted sum (simple + defensible)
-    score = (0.45 * dti) + (0.35 * cs_risk) + (0.20 * ir_norm)
-    return score.clip(0, 1)
+    # Weighted sum (simple + defensible), accumulated term by term above
+    np.clip(score, 0, 1, out=score)
+    return pd.Series(score, index=df.index)
 
 
 def compute_value_at_risk(df: pd.DataFrame, risk_score: pd.Series) -> float:
     """
     Value at risk proxy: sum(LoanAmount * risk_score)
+    Single dot product, accumulated in float64 like the former astype(float) path.
     """
-    return float((df["LoanAmount"].astype(float) * risk_score).sum())
+    return float(np.dot(df["LoanAmount"].to_numpy(dtype=np.float64), risk_score.to_numpy(dtype=np.float64)))
+
+RISK_BANDS: list[str] = ["Neutro", "Alerta", "Crítico"]
+_RISK_BAND_EDGES = np.array([0.33, 0.66])
+
 
 def classify_risk_band(risk_score: pd.Series) -> pd.Series:
     """
     Textual risk bands (accessible, not color-dependent).
+    Branchless: np.digitize over right-closed edges yields Categorical codes directly.
+    """
+    codes = np.digitize(risk_score.to_numpy(), _RISK_BAND_EDGES, right=True)
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=RISK_BANDS),
+        index=risk_score.index,
+    )
+
+
+@dataclass(frozen=True)
+class RiskArrays:
+    """
+    Enriched risk columns as raw arrays, aligned by position to the source frame.
+    """
+
+    risk_score: np.ndarray
+    risk_band: pd.Categorical
+    value_at_risk_item: np.ndarray
+    critical_dti: np.ndarray
+
+
+def compute_risk_arrays(df: pd.DataFrame, dti_threshold: float = 0.40) -> RiskArrays:
+    """
+    Risk proxy, band, value-at-risk per item and critical DTI flag, computed on
+    ndarrays end-to-end (the Series wrappers are dropped right after each step).
     """
-    return pd.cut(
-        risk_score,
-        bins=[-0.001, 0.33, 0.66, 1.001],
-        labels=["Neutro", "Alerta", "Crítico"],
-    ).astype(str)
+    rs = compute_risk_score(df)
+    return RiskArrays(
+        risk_score=rs.to_numpy(),
+        risk_band=classify_risk_band(rs).array,
+        value_at_risk_item=df["LoanAmount"].to_numpy() * rs.to_numpy(),
+        critical_dti=flag_critical_dti(df, dti_threshold).to_numpy(),
+    )
@@ -6,12 +6,13 @@ import time
 from pathlib import Path
 from typing import Iterable
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
 logger = logging.getLogger(__name__)
 
-REQUIRED_COLUMNS: list[str] = [
+REQUIRED_COLUMNS: frozenset[str] = frozenset({
     "LoanID",
     "Age",
     "Income",
@@ -30,7 +31,25 @@ REQUIRED_COLUMNS: list[str] = [
     "LoanPurpose",
     "HasCoSigner",
     "Default",
-]
+})
+
+# Narrower numeric storage: halves memory bandwidth on every column scan
+# (score 300..850, DTI 0..1, amounts well within float32 precision).
+NUMERIC_DTYPES: dict[str, str] = {
+    "Age": "int16",
+    "LoanAmount": "float32",
+    "Income": "float32",
+    "CreditScore": "int16",
+    "InterestRate": "float32",
+    "DTIRatio": "float32",
+    "LoanTerm": "int16",
+    "MonthsEmployed": "int16",
+    "NumCreditLines": "int8",
+    "Default": "int8",
+}
+
+# Low-cardinality dimensions: integer codes make groupby/isin skip string hashing.
+CATEGORICAL_COLUMNS: tuple[str, ...] = ("LoanPurpose", "EmploymentType", "Education", "MaritalStatus")
 
 
 def get_data_dir() -> Path:
@@ -44,26 +63,28 @@ def get_data_dir() -> Path:
 
 
 def _validate_schema(df: pd.DataFrame, required: Iterable[str]) -> None:
-    missing = [c for c in required if c not in df.columns]
+    missing = sorted(set(required).difference(df.columns))
     if missing:
         raise ValueError(f"Dataset schema mismatch. Missing columns: {missing}")
 
 
 def normalize_binary_yes_no(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Normalize Yes/No columns to 1/0.
+    Normalize Yes/No columns to 1/0 (int8).
     """
     yn_map = {"Yes": 1, "No": 0}
     for col in ["HasMortgage", "HasDependents", "HasCoSigner"]:
-        df[col] = df[col].astype(str).str.strip().map(yn_map)
+        # One hashing pass per column; strip/map only touch the distinct values
+        codes, uniques = pd.factorize(df[col])
+        lut = np.array([yn_map.get(str(u).strip(), -1) for u in uniques], dtype=np.int8)
 
-        # Fail-fast if unexpected values exist
-        if df[col].isna().any():
+        # Fail-fast if unexpected values exist (missing cells factorize to -1)
+        if (codes < 0).any() or (lut < 0).any():
             raise ValueError(
                 f"Unexpected values in {col}. Expected only Yes/No. "
                 "Tip: inspect raw values with df[col].value_counts()."
             )
-        df[col] = df[col].astype(int)
+        df[col] = lut[codes]
 
     return df
 
@@ -118,13 +139,18 @@ def load_dataset(filename: str = "Loan_default.csv") -> pd.DataFrame:
     csv_path = _ensure_csv_exists(data_dir, filename)
 
     logger.info("Loading dataset from: %s", csv_path)
-    df = pd.read_csv(csv_path)
+    # Arrow's multithreaded parser; columns stay NumPy-backed for the downstream kernels.
+    # Explicit dtypes: numbers land narrow and dimensions are dictionary-encoded while
+    # parsing, so no int64/object column is materialized and then converted.
+    df = pd.read_csv(
+        csv_path,
+        engine="pyarrow",
+        dtype={**NUMERIC_DTYPES, **dict.fromkeys(CATEGORICAL_COLUMNS, "category")},
+    )
 
     df = normalize_binary_yes_no(df)
     _validate_schema(df, REQUIRED_COLUMNS)
 
-    df["Default"] = df["Default"].astype(int)
-
     dt = time.perf_counter() - t0
     logger.info("Loaded dataset: shape=%s, seconds=%.3f", df.shape, dt)
 
@@ -1,42 +1,80 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
 
+def _hovertemplate(x: str, y: str, fields: dict[str, str]) -> str:
+    """
+    Plotly Express-style hover ("name=value" lines) for a go trace whose customdata
+    columns follow `fields` (name -> d3 format suffix, "" for raw).
+    """
+    y_name, _, y_fmt = y.partition(":")
+    lines = [f"{x}=%{{x}}", f"{y_name}=%{{y{':' + y_fmt if y_fmt else ''}}}"]
+    lines += [f"{name}=%{{customdata[{i}]{fmt}}}" for i, (name, fmt) in enumerate(fields.items())]
+    return "<br>".join(lines) + "<extra></extra>"
+
+
+def _empty_fig(title: str) -> go.Figure:
+    """
+    Placeholder figure for empty inputs (title only), shared by every fig_* builder.
+    """
+    return go.Figure(layout={"title": {"text": title}})
+
+
+# Fixed (default_rate, count) hover schema: only the x label varies per call
+_DR_HOVER_TAIL = "default_rate=%{y:.2%}<br>count=%{customdata[0]}<extra></extra>"
+
+
 def fig_default_rate_by_category(df_rate: pd.DataFrame, category: str) -> go.Figure:
     if df_rate.empty:
-        fig = go.Figure()
-        fig.update_layout(title=f"Default rate por {category} (sem dados)")
-        return fig
+        return _empty_fig(f"Default rate por {category} (sem dados)")
 
-    fig = px.bar(
-        df_rate,
-        x=category,
-        y="default_rate",
-        hover_data={"count": True, "default_rate": ":.2%"},
+    fig = go.Figure(
+        go.Bar(
+            x=df_rate[category].to_numpy(),
+            y=df_rate["default_rate"].to_numpy(),
+            customdata=df_rate[["count"]].to_numpy(),
+            hovertemplate=f"{category}=%{{x}}<br>" + _DR_HOVER_TAIL,
+        )
+    )
+    fig.update_layout(
         title=f"Taxa de Default por {category} (com volume mínimo)",
+        xaxis_title=category,
+        yaxis_title="default_rate",
     )
     fig.update_yaxes(tickformat=".0%")
     return fig
 
 
+# CreditScore bin edges (300..850) and their "lo-hi" labels, built once at import
+_CS_BINS = np.array([300, 500, 600, 650, 700, 750, 800, 850])
+_CS_LABELS = tuple(f"{lo}-{hi - 1}" for lo, hi in zip(_CS_BINS[:-1].tolist(), _CS_BINS[1:].tolist(), strict=True))
+
+
 def fig_credit_score_bins(df: pd.DataFrame) -> go.Figure:
     if df.empty:
-        fig = go.Figure()
-        fig.update_layout(title="Default rate por faixas de CreditScore (sem dados)")
-        return fig
-
-    bins = [300, 500, 600, 650, 700, 750, 800, 850]
-    labels = [f"{bins[i]}-{bins[i+1]-1}" for i in range(len(bins) - 1)]
-    tmp = df.copy()
-    tmp["CreditScoreBin"] = pd.cut(tmp["CreditScore"], bins=bins, labels=labels, include_lowest=True)
-
-    rate = (
-        tmp.groupby("CreditScoreBin", dropna=False)
-        .agg(default_rate=("Default", "mean"), count=("LoanID", "count"))
-        .reset_index()
+        return _empty_fig("Default rate por faixas de CreditScore (sem dados)")
+
+    # Right-closed bins like pd.cut(include_lowest=True): 300 opens the first bin and
+    # each inner edge closes the bin below it. bincount gives per-bin size and
+    # Default sum without copying the frame.
+    n_bins = len(_CS_LABELS)
+    idx = np.searchsorted(_CS_BINS, df["CreditScore"].to_numpy(), side="left") - 1
+    np.clip(idx, 0, n_bins - 1, out=idx)
+    counts = np.bincount(idx, minlength=n_bins)
+    sums = np.bincount(idx, weights=df["Default"].to_numpy(dtype=np.float64), minlength=n_bins)
+
+    rate = pd.DataFrame(
+        {
+            "CreditScoreBin": _CS_LABELS,
+            "default_rate": np.divide(sums, counts, out=np.full(n_bins, np.nan), where=counts > 0),
+            "count": counts,
+        }
     )
 
     fig = px.line(
@@ -51,19 +89,61 @@ def fig_credit_score_bins(df: pd.DataFrame) -> go.Figure:
     return fig
 
 
+@lru_cache(maxsize=32)
+def _sample_positions(n_rows: int, k: int = 5000, seed: int = 42) -> np.ndarray:
+    """
+    Fixed-seed row positions for chart samples, memoized by frame length
+    (read-only and sorted, so the gather walks the frame forward).
+    """
+    rng = np.random.default_rng(seed)
+    idx = np.sort(rng.choice(n_rows, size=min(n_rows, k), replace=False))
+    idx.flags.writeable = False
+    return idx
+
+
+def _stratified_positions(labels: np.ndarray, per_class: int = 1500) -> np.ndarray:
+    """
+    Up to `per_class` row positions for each label value (e.g. Default 0/1), so the
+    minority class stays visible in chart samples; sorted like _sample_positions.
+    """
+    parts = []
+    for value in np.unique(labels):
+        members = np.flatnonzero(labels == value)
+        parts.append(members[_sample_positions(len(members), per_class)])
+    return np.sort(np.concatenate(parts))
+
+
 def fig_scatter_risk(df: pd.DataFrame) -> go.Figure:
     if df.empty:
-        fig = go.Figure()
-        fig.update_layout(title="Risco: LoanAmount vs CreditScore (sem dados)")
-        return fig
-
-    fig = px.scatter(
-        df.sample(min(len(df), 5000), random_state=42),
-        x="CreditScore",
-        y="LoanAmount",
-        color="Default",
-        hover_data=["Income", "InterestRate", "LoanPurpose", "EmploymentType", "DTIRatio"],
+        return _empty_fig("Risco: LoanAmount vs CreditScore (sem dados)")
+
+    # Only plotted/hovered columns are gathered, so the figure JSON carries nothing else
+    hover = ["Income", "InterestRate", "LoanPurpose", "EmploymentType", "DTIRatio", "Default"]
+    cols = ["CreditScore", "LoanAmount", *hover]
+    col_idx = df.columns.get_indexer(cols)
+    if (col_idx < 0).any():  # -1 would make iloc read the last column
+        raise KeyError([c for c, i in zip(cols, col_idx, strict=True) if i < 0])
+    sample = df.iloc[_stratified_positions(df["Default"].to_numpy()), col_idx]
+
+    # Narrow integer axes and 2-decimal hover floats: short JSON tokens instead of
+    # float32 round-trip noise like 22.920000076293945
+    customdata = sample[hover].astype({"Income": "float64", "InterestRate": "float64", "DTIRatio": "float64"}).round(2)
+    fig = go.Figure(
+        go.Scattergl(
+            x=sample["CreditScore"].to_numpy(dtype=np.int16),
+            y=np.rint(sample["LoanAmount"].to_numpy()).astype(np.int32),
+            mode="markers",
+            marker={"color": sample["Default"].to_numpy(dtype=np.int8), "coloraxis": "coloraxis"},
+            customdata=customdata.to_numpy(dtype=object),
+            hovertemplate=_hovertemplate("CreditScore", "LoanAmount", dict.fromkeys(hover, "")),
+        )
+    )
+    fig.update_layout(
         title="Risco: Valor do Empréstimo vs Credit Score (amostra)",
+        xaxis_title="CreditScore",
+        yaxis_title="LoanAmount",
+        coloraxis_colorbar_title_text="Default",
+        uirevision="locked",
     )
     return fig
 
@@ -73,21 +153,64 @@ def fig_driver_deltas(drivers: pd.DataFrame) -> go.Figure:
     Bar chart: delta_pct for numeric drivers (Default=1 vs Default=0).
     """
     if drivers.empty:
-        fig = go.Figure()
-        fig.update_layout(title="Drivers (sem dados)")
-        return fig
-
-    top = drivers.head(10).copy()
-    fig = px.bar(
-        top,
-        x="feature",
-        y="delta_pct",
-        hover_data={"delta_pct": ":.2%","delta": ":.3f","mean_default_0": ":.3f","mean_default_1": ":.3f"},
+        return _empty_fig("Drivers (sem dados)")
+
+    # Explicit top-10 by delta_pct (no reliance on the caller's sort order)
+    top = drivers.nlargest(10, "delta_pct")
+    hover = {"delta": ":.3f", "mean_default_0": ":.3f", "mean_default_1": ":.3f"}
+    fig = go.Figure(
+        go.Bar(
+            x=top["feature"].to_numpy(),
+            y=top["delta_pct"].to_numpy(),
+            customdata=top[list(hover)].to_numpy(),
+            hovertemplate=_hovertemplate("feature", "delta_pct:.2%", hover),
+        )
+    )
+    fig.update_layout(
         title="Top 10 Drivers Numéricos — Diferença relativa (Default=1 vs Default=0)",
+        xaxis_title="feature",
+        yaxis_title="delta_pct",
     )
     fig.update_yaxes(tickformat=".0%")
     return fig
 
+
+def _group_medians(values: np.ndarray, order: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Per-group NaN-skipping median over rows grouped contiguously by `order`
+    (groups are [edges[i], edges[i+1]) of values[order]); one O(n) selection per group.
+    Float columns keep their dtype, integers yield float64, like pandas' groupby median.
+    """
+    grouped = values[order]
+    is_float = np.issubdtype(grouped.dtype, np.floating)
+    out = np.full(len(edges) - 1, np.nan, dtype=grouped.dtype if is_float else np.float64)
+    for i in range(len(out)):
+        part = grouped[edges[i] : edges[i + 1]]
+        if is_float:
+            part = part[~np.isnan(part)]
+        if part.size:
+            out[i] = np.median(part)
+    return out
+
+
+def _group_modes(codes: np.ndarray, n: int, values: pd.Series) -> np.ndarray:
+    """
+    Most frequent non-null value per group ("N/A" when a group has none): one bincount
+    over (group, value) code pairs reshaped to n x m, then argmax per row. Ties go to the
+    first value in sorted/category order, like Series.mode().
+    """
+    vcodes, uniques = pd.factorize(values, sort=True)
+    m = len(uniques)
+    valid = vcodes >= 0
+    counts = np.bincount(codes[valid] * m + vcodes[valid], minlength=n * m).reshape(n, m)
+    modes = np.full(n, "N/A", dtype=object)
+    if m:
+        best = counts.argmax(axis=1)
+        has = counts[np.arange(n), best] > 0
+        modes[has] = np.asarray(uniques, dtype=object)[best[has]]
+    return modes
+
+
 def build_segment_profile(df: pd.DataFrame, by: str) -> pd.DataFrame:
     """
     Returns a segment table with:
@@ -99,55 +222,89 @@ def build_segment_profile(df: pd.DataFrame, by: str) -> pd.DataFrame:
     if df.empty:
         return pd.DataFrame()
 
-    def mode_or_na(s: pd.Series) -> str:
-        s = s.dropna()
-        return str(s.mode().iloc[0]) if not s.empty else "N/A"
-
-    out = (
-        df.groupby(by, dropna=False)
-        .agg(
-            count=("LoanID", "count"),
-            default_rate=("Default", "mean"),
-            var_sum=("value_at_risk_item", "sum"),
-            age_med=("Age", "median"),
-            income_med=("Income", "median"),
-            score_med=("CreditScore", "median"),
-            dti_med=("DTIRatio", "median"),
-            emp_mode=("EmploymentType", mode_or_na),
-            edu_mode=("Education", mode_or_na),
-            mar_mode=("MaritalStatus", mode_or_na),
-        )
-        .reset_index()
+    # Segment codes once (same order/NaN handling as groupby(dropna=False, observed=True));
+    # count and sums come from bincount; medians select within one shared grouping order
+    codes, segments = pd.factorize(df[by], sort=True, use_na_sentinel=False)
+    n = len(segments)
+    count = np.bincount(codes, minlength=n)
+    var_sum = np.bincount(codes, weights=df["value_at_risk_item"].to_numpy(dtype=np.float64), minlength=n)
+    order = np.argsort(codes, kind="stable")
+    edges = np.concatenate(([0], np.cumsum(count)))
+    medians = {
+        col: _group_medians(df[col].to_numpy(), order, edges) for col in ("Age", "Income", "CreditScore", "DTIRatio")
+    }
+    out = pd.DataFrame(
+        {
+            by: segments,
+            "count": count,
+            "default_rate": np.bincount(codes, weights=df["Default"].to_numpy(dtype=np.float64), minlength=n) / count,
+            "var_sum": var_sum,
+            "age_med": medians["Age"],
+            "income_med": medians["Income"],
+            "score_med": medians["CreditScore"],
+            "dti_med": medians["DTIRatio"],
+        }
     )
 
-    total_var = float(out["var_sum"].sum()) if out["var_sum"].sum() else 0.0
-    out["risk_share"] = (out["var_sum"] / total_var) if total_var > 0 else 0.0
-    out = out.sort_values(["var_sum", "default_rate", "count"], ascending=[False, False, False])
-    return out
+    # Dominant categories from (segment, value) code-pair counts; the NaN segment
+    # (kept by dropna=False semantics) gets its own mode like any other
+    for col, name in (("EmploymentType", "emp_mode"), ("Education", "edu_mode"), ("MaritalStatus", "mar_mode")):
+        out[name] = _group_modes(codes, n, df[col])
+
+    total_var = float(var_sum.sum())
+    out["risk_share"] = (var_sum / total_var) if total_var > 0 else 0.0
+    # var_sum, default_rate, count descending: stable lexsort on negated keys (last key primary)
+    order = np.lexsort((-count, -out["default_rate"].to_numpy(), -var_sum))
+    return out.iloc[order].reset_index(drop=True)
+
+
+_PROFILE_COLUMNS: list[str] = [
+    "LoanID",
+    "Default",
+    "value_at_risk_item",
+    "Age",
+    "Income",
+    "CreditScore",
+    "DTIRatio",
+    "EmploymentType",
+    "Education",
+    "MaritalStatus",
+]
+
+
+def build_segment_profiles(df: pd.DataFrame, dims: list[str]) -> dict[str, pd.DataFrame]:
+    """
+    build_segment_profile for several dimensions in one pass over the input:
+    the profile columns are projected once and every groupby runs on that narrow frame.
+    """
+    narrow = df[list(dict.fromkeys([*dims, *_PROFILE_COLUMNS]))]
+    return {by: build_segment_profile(narrow, by) for by in dims}
 
 
 def fig_risk_by_segment(seg: pd.DataFrame, by: str) -> go.Figure:
     if seg.empty:
-        fig = go.Figure()
-        fig.update_layout(title=f"Risco por {by} (sem dados)")
-        return fig
-
-    fig = px.bar(
-        seg.head(15),
-        x=by,
-        y="var_sum",
-        hover_data={
-            "risk_share": ":.2%",
-            "default_rate": ":.2%",
-            "count": True,
-            "age_med": ":.0f",
-            "income_med": ":.0f",
-            "score_med": ":.0f",
-            "dti_med": ":.2f",
-            "emp_mode": True,
-            "edu_mode": True,
-            "mar_mode": True,
-        },
-        title=f"Top segmentos por Valor em Risco — {by}",
+        return _empty_fig(f"Risco por {by} (sem dados)")
+
+    top = seg.head(15)
+    hover = {
+        "risk_share": ":.2%",
+        "default_rate": ":.2%",
+        "count": "",
+        "age_med": ":.0f",
+        "income_med": ":.0f",
+        "score_med": ":.0f",
+        "dti_med": ":.2f",
+        "emp_mode": "",
+        "edu_mode": "",
+        "mar_mode": "",
+    }
+    fig = go.Figure(
+        go.Bar(
+            x=top[by].to_numpy(),
+            y=top["var_sum"].to_numpy(),
+            customdata=top[list(hover)].to_numpy(dtype=object),
+            hovertemplate=_hovertemplate(by, "var_sum", hover),
+        )
     )
+    fig.update_layout(title=f"Top segmentos por Valor em Risco — {by}", xaxis_title=by, yaxis_title="var_sum")
     return fig
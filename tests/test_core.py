@@ -1,9 +1,19 @@
+import numpy as np
 import pandas as pd
+import pytest
 
+from src.app import _topk_idx
+from src.components.sidebar import SmartFilters
 from src.core.metrics import compute_kpis, segment_default_rate
+from src.core.processing import apply_smart_filters
+from src.core.risk import classify_risk_band, compute_risk_score
+from src.database.loader import normalize_binary_yes_no
+from src.visualizations import _CS_BINS, _CS_LABELS, build_segment_profile, fig_credit_score_bins
 
 
-def make_df():
+@pytest.fixture(scope="module")
+def df():
+    # Shared across tests: tests that mutate must work on a copy
     return pd.DataFrame(
         {
             "LoanID": [1, 2, 3, 4, 5],
@@ -20,16 +30,146 @@ def make_df():
     )
 
 
-def test_compute_kpis():
-    df = make_df()
+def test_compute_kpis(df):
     kpis = compute_kpis(df)
     assert kpis["total_loans"] == 5
+    assert kpis["total_defaults"] == 3
     assert abs(kpis["default_rate"] - 0.6) < 1e-9
 
 
-def test_segment_default_rate_min_count():
-    df = make_df()
+def test_segment_default_rate_min_count(df):
     seg = segment_default_rate(df, "LoanPurpose", min_count=3)
     # only "B" appears 3 times
     assert len(seg) == 1
     assert seg.iloc[0]["LoanPurpose"] == "B"
+
+
+def test_apply_smart_filters_categorical(df):
+    df = df.copy()
+    df["LoanPurpose"] = df["LoanPurpose"].astype("category")
+    df["EmploymentType"] = pd.Categorical(["X", "Y", "Z", None, "Y"])
+    f = SmartFilters(income_range=(3500, 5200), loan_purpose=["B"], employment_type=["Y", "Z"])
+    out = apply_smart_filters(df, f)
+    # income bounds are inclusive; LoanID 4 has NaN EmploymentType
+    assert out["LoanID"].tolist() == [3, 5]
+
+
+def test_classify_risk_band_edges_are_right_closed():
+    bands = classify_risk_band(pd.Series([0.0, 0.33, 0.34, 0.66, 0.67, 1.0]))
+    assert bands.astype(str).tolist() == ["Neutro", "Neutro", "Alerta", "Alerta", "Crítico", "Crítico"]
+
+
+def test_compute_risk_score_skips_nan_interest_rate(df):
+    with_nan = df.copy()
+    with_nan["InterestRate"] = with_nan["InterestRate"].astype(float)
+    with_nan.loc[2, "InterestRate"] = float("nan")
+    ref = df.drop(index=2)
+
+    score = compute_risk_score(with_nan)
+    # the NaN rate only affects its own row; the cut points come from the other rates
+    assert pd.isna(score.loc[2])
+    assert score.drop(index=2).tolist() == pytest.approx(compute_risk_score(ref).tolist())
+
+
+def test_normalize_binary_yes_no():
+    df = pd.DataFrame(
+        {"HasMortgage": ["Yes", " No"], "HasDependents": ["No", "Yes "], "HasCoSigner": ["Yes", "Yes"]}
+    )
+    out = normalize_binary_yes_no(df)
+    assert out["HasMortgage"].tolist() == [1, 0]
+    assert out["HasDependents"].tolist() == [0, 1]
+    assert str(out["HasCoSigner"].dtype) == "int8"
+
+    bad = pd.DataFrame({"HasMortgage": ["Yes", None], "HasDependents": ["No", "No"], "HasCoSigner": ["No", "No"]})
+    with pytest.raises(ValueError):
+        normalize_binary_yes_no(bad)
+
+
+def test_build_segment_profile_nan_segment_has_mode():
+    df = pd.DataFrame(
+        {
+            "G": ["a", "a", None, None, None],
+            "LoanID": [1, 2, 3, 4, 5],
+            "Default": [0, 1, 0, 0, 1],
+            "value_at_risk_item": [1.0, 1.0, 1.0, 1.0, 1.0],
+            "Age": [30, 40, 50, 60, 70],
+            "Income": [1.0, 2.0, 3.0, 4.0, 5.0],
+            "CreditScore": [600, 610, 620, 630, 640],
+            "DTIRatio": [0.1, 0.2, 0.3, 0.4, 0.5],
+            "EmploymentType": ["x", "x", "y", "y", "y"],
+            "Education": ["e", "e", "e", "e", "e"],
+            "MaritalStatus": ["m", "m", "m", "m", "m"],
+        }
+    )
+    out = build_segment_profile(df, "G")
+    nan_row = out[out["G"].isna()].iloc[0]
+    # dropna=False semantics: the NaN segment is profiled like any other
+    assert nan_row["emp_mode"] == "y"
+    assert nan_row["count"] == 3
+
+
+def test_build_segment_profile_aggregates_modes_and_order():
+    # b and a tie on var_sum (30) and default_rate (0.5): count breaks the tie.
+    age = [30, 40, 20, 30, 40, 50, 60, 61, 62]
+    df = pd.DataFrame(
+        {
+            "G": ["a", "a", "b", "b", "b", "b", None, None, None],
+            "LoanID": range(9),
+            "Default": [1, 0, 1, 1, 0, 0, 0, 0, 1],
+            "value_at_risk_item": [10.0, 20.0, 5.0, 5.0, 10.0, 10.0, 1.0, 1.0, 1.0],
+            "Age": age,
+            "Income": [a * 1000.0 for a in age],
+            "CreditScore": [500 + a for a in age],
+            "DTIRatio": [a / 100 for a in age],
+            "EmploymentType": ["x", "y", "y", "y", "x", "z", "y", "y", "y"],
+            "Education": [None, None, "p", "q", "q", "p", "q", "q", "p"],
+            "MaritalStatus": ["m"] * 9,
+        }
+    )
+    out = build_segment_profile(df, "G")
+
+    assert out["G"].tolist()[:2] == ["b", "a"]
+    assert pd.isna(out["G"].iloc[2])
+    assert out["count"].tolist() == [4, 2, 3]
+    assert out["default_rate"].tolist() == pytest.approx([0.5, 0.5, 1 / 3])
+    assert out["var_sum"].tolist() == pytest.approx([30.0, 30.0, 3.0])
+    assert out["risk_share"].tolist() == pytest.approx([30 / 63, 30 / 63, 3 / 63])
+    assert out["age_med"].tolist() == [35.0, 35.0, 61.0]
+    assert out["income_med"].tolist() == [35000.0, 35000.0, 61000.0]
+    assert out["score_med"].tolist() == [535.0, 535.0, 561.0]
+    assert out["dti_med"].tolist() == pytest.approx([0.35, 0.35, 0.61])
+    # ties resolve to the first value in sorted order; all-null groups read "N/A"
+    assert out["emp_mode"].tolist() == ["y", "x", "y"]
+    assert out["edu_mode"].tolist() == ["p", "N/A", "q"]
+    assert out["mar_mode"].tolist() == ["m", "m", "m"]
+
+
+def test_fig_credit_score_bins_keeps_pd_cut_boundaries():
+    scores = [300, 499, 500, 501, 600, 650, 700, 750, 800, 801, 850]
+    df = pd.DataFrame({"CreditScore": scores, "Default": [1] * len(scores)})
+    fig = fig_credit_score_bins(df)
+    counts = [int(c[0]) for c in fig.data[0].customdata]
+    # right-closed edges, lowest included: 500 stays in "300-499", 800 in "750-799"
+    expected = pd.cut(pd.Series(scores), bins=_CS_BINS, labels=list(_CS_LABELS), include_lowest=True)
+    assert counts == expected.value_counts(sort=False).tolist()
+    assert counts == [3, 2, 1, 1, 1, 1, 2]
+
+
+def test_topk_idx_matches_sort_head():
+    scores = pd.DataFrame(
+        {
+            "risk_score": [0.2, np.nan, 0.9, 0.5, np.nan, 0.7],
+            "critical_dti": [False, True, True, False, True, False],
+        }
+    )
+    # NaN scores sort last, as in sort_values(ascending=False).head(n)
+    assert _topk_idx(scores, "risk_score", 3, only_critical=False).tolist() == [2, 5, 3]
+    assert _topk_idx(scores, "risk_score", 4, only_critical=False).tolist() == [2, 5, 3, 0]
+    # top_n beyond len(df) returns every row, NaN last
+    out = _topk_idx(scores, "risk_score", 50, only_critical=False)
+    assert out[:4].tolist() == [2, 5, 3, 0]
+    assert sorted(out[4:].tolist()) == [1, 4]
+    # only_critical returns positions in the full frame
+    assert _topk_idx(scores, "risk_score", 1, only_critical=True).tolist() == [2]
+    none_critical = scores.assign(critical_dti=False)
+    assert _topk_idx(none_critical, "risk_score", 3, only_critical=True).tolist() == []